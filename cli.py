@@ -13,7 +13,7 @@ from hashlib import md5
 
 from loguru import logger
 
-from providers import Cds, Copernicus, GoogleEarthEngine, Modis, OpenTopography, Usgs
+import providers
 from utilities import ConfigLoader, GeometryHandler, OCIFSManager
 
 
@@ -100,18 +100,19 @@ def main():
 
     # Map string provider names to their implementations
     provider_map = {
-        "copernicus": Copernicus,
-        "usgs": Usgs,
-        "opentopography": OpenTopography,
-        "cds": Cds,
-        "modis": Modis,
-        "google_earth_engine": GoogleEarthEngine,
+        "copernicus": "Copernicus",
+        "usgs": "Usgs",
+        "opentopography": "OpenTopography",
+        "cds": "Cds",
+        "modis": "Modis",
+        "google_earth_engine": "GoogleEarthEngine",
     }
-    # Select provider based on input argument
-    provider_cls = provider_map.get(args.provider.lower())
-    if not provider_cls:
+    # Select provider based on input argument; only its module gets imported
+    provider_name = provider_map.get(args.provider.lower())
+    if not provider_name:
         logger.error(f"Unknown provider: {args.provider}. Exiting.")
         exit(1)
+    provider_cls = getattr(providers, provider_name)
 
     # check if destination is OCI
     if args.destination == "oci":
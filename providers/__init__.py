@@ -1,9 +1,23 @@
-from .cds import Cds
-from .copernicus import Copernicus
-from .google_earth_engine import GoogleEarthEngine
-from .modis import Modis
-from .open_topography import OpenTopography
-from .provider_base import ProviderBase
-from .usgs import Usgs
+from importlib import import_module
+
+# Provider modules are imported on first access, so selecting one provider does
+# not pull in the SDKs of all the others (ee, cdsapi, ...)
+_PROVIDER_MODULES = {
+    "Cds": ".cds",
+    "Copernicus": ".copernicus",
+    "GoogleEarthEngine": ".google_earth_engine",
+    "Modis": ".modis",
+    "OpenTopography": ".open_topography",
+    "ProviderBase": ".provider_base",
+    "Usgs": ".usgs",
+}
 
 __all__ = ["Copernicus", "Usgs", "ProviderBase", "OpenTopography", "Cds", "Modis", "GoogleEarthEngine"]
+
+
+def __getattr__(name):
+    if name not in _PROVIDER_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    provider_cls = getattr(import_module(_PROVIDER_MODULES[name], __name__), name)
+    globals()[name] = provider_cls
+    return provider_cls
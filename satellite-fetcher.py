@@ -1,82 +1,185 @@
+import hashlib
 import os
 import re
 from pathlib import Path
 
 import folium
 import geopandas as gpd
+import numpy as np
+import orjson
 import shapely
 import streamlit as st
 from loguru import logger
-from shapely.geometry import Polygon
 from streamlit_file_browser import st_file_browser
 from streamlit_folium import st_folium
 from utilities import ConfigLoader
 
 
+# tqdm progress bar formats found in the CLI log, combined into one pattern
+# compiled once at import so each line is matched a single time; the
+# alternative that matched is reported by match.lastgroup
+_PROGRESS_RE = re.compile(
+    r"^(?:"
+    # Concurrent downloads bar
+    r"(?P<batch>Concurrent Downloads:\s*"  # Description before colon
+    r"(?P<batch_percent>\d+)%\|\s*[^\|]*\|\s*"  # Percent and bar (allowing any content between |)
+    r"(?P<batch_done>\d+)/(?P<batch_total>\d+)\s*"  # Done/Total tasks
+    r"\[\s*(?P<batch_elapsed>[0-9:?]+)<(?P<batch_eta>[^\]]+)\]\s*"  # Elapsed and ETA/remaining (anything until ])
+    r"(?P<batch_rate>[^\s]*/?[^\s]*?)?\s*$)"  # Optional rate like '?it/s' or '5.00it/s'
+    r"|"
+    # Per-file download bars
+    r"(?P<download>Downloading\s+(?P<filename>.+?):\s*"  # Filename
+    r"(?P<percent>\d+)%\|\s*.*?\|\s*"  # Percent + bar
+    r"(?P<done>[\d\.]+[kMGTP]?)/(?P<total>[\d\.]+[kMGTP]?)\s*"  # Done/Total with units
+    r"\[(?P<elapsed>[0-9:]+)<(?P<eta>[0-9:?\-]+)\])"  # Elapsed and ETA
+    r")"
+)
+
+# How much of an existing log to read when the page is first opened
+_LOG_TAIL_BYTES = 256 * 1024
+
+
 # --- Live log function (tail -f alike for Streamlit) ---
 @st.fragment(run_every="2000ms")  # refresh every 2s
 def show_live_logs(log_path="nohup.out"):
     log_path = Path(log_path)
-    batch_re = re.compile(
-        r"^Concurrent Downloads:\s*"  # Description before colon
-        r"(?P<percent>\d+)%\|\s*[^\|]*\|\s*"  # Percent and bar (allowing any content between |)
-        r"(?P<done>\d+)/(?P<total>\d+)\s*"  # Done/Total tasks
-        r"\[\s*(?P<elapsed>[0-9:?]+)<(?P<eta>[^\]]+)\]\s*"  # Elapsed and ETA/remaining (anything until ])
-        r"(?P<rate>[^\s]*/?[^\s]*?)?\s*$"  # Optional rate like '?it/s' or '5.00it/s'
-    )
 
-    # New regex for download progress bars (the ones in your log)
-    download_re = re.compile(
-        r"^Downloading\s+(?P<filename>.+?):\s*"  # Filename
-        r"(?P<percent>\d+)%\|\s*.*?\|\s*"  # Percent + bar
-        r"(?P<done>[\d\.]+[kMGTP]?)/(?P<total>[\d\.]+[kMGTP]?)\s*"  # Done/Total with units
-        r"\[(?P<elapsed>[0-9:]+)<(?P<eta>[0-9:?\-]+)\]"  # Elapsed and ETA
-    )
+    def parse_progress(line):
+        # Record a tqdm progress bar line, returning False for plain log lines
+        m = _PROGRESS_RE.match(line)
+        if m is None:
+            return False
+        if m.lastgroup == "batch":
+            desc = "Concurrent Downloads"
+            percent = int(m.group("batch_percent"))
+            done, total = int(m.group("batch_done")), int(m.group("batch_total"))
+            progress_bars_info[desc] = {
+                "label": f"🌐 {desc} ({done}/{total})",
+                "percent": percent,
+            }
+        else:
+            desc = m.group("filename").strip()
+            percent = int(m.group("percent"))
+            done, total = m.group("done"), m.group("total")
+            elapsed = m.group("elapsed").strip()
+            eta = m.group("eta").strip()
+            progress_bars_info[desc] = {
+                "label": f"📥 {desc} ({done}/{total}) | Elapsed: {elapsed} | ETA: {eta}",
+                "percent": percent,
+            }
+        return True
+
     with st.container():
-        progress_bars_info = {}
-        non_progress_lines = []
-        if log_path.exists():
-            with log_path.open("r") as f:
-                lines = f.readlines()
-            for line in lines:
-                line = line.strip()
-                m = batch_re.search(line)
-                if m:
-                    desc = "Concurrent Downloads"
-                    percent = int(m.group("percent"))
-                    done, total = int(m.group("done")), int(m.group("total"))
-                    progress_bars_info[desc] = {
-                        "label": f"🌐 {desc} ({done}/{total})",
-                        "percent": percent,
-                    }
-                    continue
-                m = download_re.search(line)
-                if m:
-                    desc = m.group("filename").strip()
-                    percent = int(m.group("percent"))
-                    done, total = m.group("done"), m.group("total")
-                    elapsed = m.group("elapsed").strip()
-                    eta = m.group("eta").strip()
-                    progress_bars_info[desc] = {
-                        "label": f"📥 {desc} ({done}/{total}) | Elapsed: {elapsed} | ETA: {eta}",
-                        "percent": percent,
-                    }
-                    continue
-                # Collect non-matching lines to display as plain logs if wanted
-                if line:
-                    non_progress_lines.append(line)
-        # Render all detected progress bars
+        if "log_offset" not in st.session_state:
+            reset_live_logs()
+        lines = []
+        log_stat = log_path.stat() if log_path.exists() else None
+        if log_stat is not None:
+            # The log was truncated by a new download: start over
+            if log_stat.st_size < st.session_state["log_offset"]:
+                reset_live_logs()
+            # Only open the file when the CLI wrote to it since the previous refresh
+            unchanged = (
+                log_stat.st_mtime_ns == st.session_state["log_mtime"]
+                and log_stat.st_size == st.session_state["log_offset"]
+            )
+            if not unchanged:
+                st.session_state["log_mtime"] = log_stat.st_mtime_ns
+                # Only read the bytes appended since the previous refresh; on the
+                # first read of a long log only its tail matters
+                offset = st.session_state["log_offset"]
+                skip_head = offset == 0 and log_stat.st_size > _LOG_TAIL_BYTES
+                if skip_head:
+                    offset = log_stat.st_size - _LOG_TAIL_BYTES
+                with log_path.open("rb") as f:
+                    f.seek(offset)
+                    chunk = f.read()
+                st.session_state["log_offset"] = offset + len(chunk)
+                # tqdm redraws its bars with carriage returns, so treat them as
+                # line ends
+                data = st.session_state["log_remnant"] + chunk
+                lines = (
+                    data.replace(b"\r\n", b"\n").replace(b"\r", b"\n").split(b"\n")
+                )
+                # Keep the trailing partial line until it is completed
+                st.session_state["log_remnant"] = lines.pop()
+                # The tail starts mid-line
+                if skip_head and lines:
+                    del lines[0]
+        # Parsed state persists across refreshes so a tick without new output
+        # still renders the last known progress
+        progress_bars_info = st.session_state["log_bars"]
+        non_progress_lines = st.session_state["log_lines"]
+        for line in lines:
+            line = line.decode("utf-8", errors="replace").strip()
+            if parse_progress(line):
+                continue
+            # Collect non-matching lines to display as plain logs if wanted
+            if line:
+                non_progress_lines.append(line)
+        del non_progress_lines[:-4]
+        # The partial line is usually the latest tqdm redraw
+        parse_progress(
+            st.session_state["log_remnant"].decode("utf-8", errors="replace").strip()
+        )
+        # Render all detected progress bars, with the label as the bar's own
+        # text so each bar is a single element
         for desc, pb in progress_bars_info.items():
-            st.write(pb["label"])
-            st.progress(pb["percent"])
-        # Optionally, display last 4 non-progress lines for context
+            st.progress(pb["percent"], text=pb["label"])
+        # Optionally, display last 4 non-progress lines for context as one
+        # plain-text element, so log content is never read as markdown
         if non_progress_lines:
             st.markdown("#### Recent Logs")
-            for l in non_progress_lines[-4:]:
-                st.write(l)
+            st.text("\n".join(non_progress_lines))
+
+
+def reset_live_logs():
+    # Forget everything read from the log so the next refresh starts from scratch
+    st.session_state["log_offset"] = 0
+    st.session_state["log_mtime"] = None
+    st.session_state["log_remnant"] = b""
+    st.session_state["log_bars"] = {}
+    st.session_state["log_lines"] = []
+
+
+def build_polygons(current_polygons):
+    # Build every drawn polygon with a single vectorized Shapely call: the outer
+    # rings are packed into one coordinate array plus a ring index per vertex.
+    # Like Polygon(), shapely.linearrings closes open rings, so 3 points suffice;
+    # self-intersecting drawings are kept as drawn
+    rings = [
+        poly_info["coordinates"]
+        for poly_info in current_polygons
+        if len(poly_info["coordinates"]) >= 3
+    ]
+    if len(rings) < len(current_polygons):
+        st.warning("Skipped drawn polygons with fewer than 3 points.")
+    if not rings:
+        return np.empty(0, dtype=object)
+    coords = np.concatenate([np.asarray(ring, dtype=float) for ring in rings])
+    indices = np.repeat(np.arange(len(rings)), [len(ring) for ring in rings])
+    return shapely.polygons(shapely.linearrings(coords, indices=indices))
+
+
+# Tile layer styles are shared by every feature: folium calls the style function
+# once per tile, so return the same dict instead of building one each time
+GRID_STYLE = {"color": "gray", "weight": 1, "fillOpacity": 0}
+INTERSECTING_TILE_STYLE = {
+    "color": "red",
+    "weight": 3,
+    "fillColor": "red",
+    "fillOpacity": 0.3,
+}
+
 
+def drawings_fingerprint(all_drawings):
+    # Hash the raw drawings as canonical orjson bytes: change detection happens
+    # in C before any polygon is built from the drawing data
+    payload = orjson.dumps(all_drawings, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).digest()
 
-def create_drawing_map(center_lat=0.0, center_lng=0.0, zoom=10, tiles_gdf=None):
+
+def create_drawing_map(center_lat=0.0, center_lng=0.0, zoom=10, tiles_geojson=None):
     # Create the base map
     m = folium.Map(
         location=[center_lat, center_lng], zoom_start=zoom, tiles="OpenStreetMap"
@@ -90,11 +193,11 @@ def create_drawing_map(center_lat=0.0, center_lng=0.0, zoom=10, tiles_gdf=None):
     ).add_to(m)
 
     # Add tile boundaries if available
-    if tiles_gdf is not None:
+    if tiles_geojson is not None:
         folium.GeoJson(
-            tiles_gdf,
+            tiles_geojson,
             name="All Tiles",
-            style_function=lambda x: {"color": "gray", "weight": 1, "fillOpacity": 0},
+            style_function=lambda x: GRID_STYLE,
         ).add_to(m)
 
     # Add drawing tools
@@ -119,18 +222,142 @@ def create_drawing_map(center_lat=0.0, center_lng=0.0, zoom=10, tiles_gdf=None):
     return m
 
 
+SHAPEFILE_EXTENSIONS = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+
+
+def load_tile_grid(shapefile_path):
+    # Prefer the GeoParquet copy stored next to the shapefile: it is a columnar
+    # binary read with bulk WKB decoding instead of a SHP/DBF parse
+    shapefile = Path(shapefile_path)
+    parquet_path = shapefile.with_suffix(".parquet")
+    # A copy older than any of the shapefile's files is stale and gets rebuilt
+    # below; the tile names live in the .dbf, not the .shp
+    if parquet_path.exists() and (
+        not shapefile.exists()
+        or parquet_path.stat().st_mtime >= shapefile_mtime(shapefile)
+    ):
+        try:
+            return ensure_4326(
+                gpd.read_parquet(parquet_path, columns=["Name", "geometry"])
+            )
+        except Exception as e:
+            # A corrupt copy must not block start-up: rebuild it from the shapefile
+            logger.warning(f"Could not read GeoParquet cache {parquet_path}: {e}")
+    # Read through pyogrio's Arrow path and skip the attribute columns the app
+    # never uses; only the tile name is needed
+    tiles_gdf = ensure_4326(
+        gpd.read_file(
+            shapefile_path, engine="pyogrio", use_arrow=True, columns=["Name"]
+        )
+    )
+    # Write to a temporary file first and move it into place, so an interrupted
+    # write never leaves a truncated copy that looks newer than the shapefile
+    tmp_path = parquet_path.with_name(f"{parquet_path.name}.{os.getpid()}.tmp")
+    try:
+        # Convert once so every later cold start takes the fast path; the copy is
+        # written already in EPSG:4326 so loading it never triggers a reprojection
+        tiles_gdf.to_parquet(tmp_path, compression="zstd", index=False)
+        os.replace(tmp_path, parquet_path)
+        logger.info(f"Cached tile grid as GeoParquet: {parquet_path}")
+    except Exception as e:
+        tmp_path.unlink(missing_ok=True)
+        logger.warning(f"Could not write GeoParquet cache {parquet_path}: {e}")
+    return tiles_gdf
+
+
+def shapefile_mtime(shapefile):
+    # Newest modification time across the shapefile and its sidecar files
+    sidecars = (shapefile.with_suffix(ext) for ext in SHAPEFILE_EXTENSIONS)
+    return max(path.stat().st_mtime for path in sidecars if path.exists())
+
+
+def ensure_4326(tiles_gdf):
+    # Drawn polygons come from Leaflet in WGS84: bring the grid to EPSG:4326 once
+    # at load time (init is cached) so no query ever needs a reprojection
+    if tiles_gdf.crs is None:
+        return tiles_gdf.set_crs(4326)
+    if tiles_gdf.crs.to_epsg() != 4326:
+        return tiles_gdf.to_crs(4326)
+    return tiles_gdf
+
+
+@st.cache_resource(show_spinner="Loading tile grids...")
 def init():
     # Load the shapefile
     shapefile_path = "data/Sentinel-2-tiles/sentinel_2_index_shapefile.shp"
-    sentinel2_tiles = gpd.read_file(shapefile_path)
+    sentinel2_tiles = load_tile_grid(shapefile_path)
     return {"SENTINEL-2": sentinel2_tiles}
 
 
+@st.cache_resource
+def build_tile_index(satellite):
+    # Bulk-load an STRtree over the tile footprints once per process; cached as a
+    # resource so the tree is shared across reruns instead of being pickled
+    return shapely.STRtree(init()[satellite].geometry.values)
+
+
+def tiles_to_geojson(tiles_gdf):
+    # Encode geometries in one vectorized shapely call and only the small
+    # property dicts with orjson, instead of building a Python dict per feature
+    geometries = shapely.to_geojson(tiles_gdf.geometry.values)
+    properties = tiles_gdf.drop(columns=tiles_gdf.geometry.name).to_dict("records")
+    features = ",".join(
+        '{"type":"Feature","properties":%s,"geometry":%s}'
+        % (orjson.dumps(props).decode(), "null" if geometry is None else geometry)
+        for props, geometry in zip(properties, geometries)
+    )
+    return '{"type":"FeatureCollection","features":[%s]}' % features
+
+
+@st.cache_resource
+def serialize_tiles(satellite):
+    # Serialize the whole grid to GeoJSON once per process, so reruns skip the
+    # to_crs and __geo_interface__ pass folium makes over a GeoDataFrame
+    return tiles_to_geojson(init()[satellite])
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def serialize_intersecting_tiles(satellite, tile_rows):
+    # The highlight layer is rebuilt on every rerun, so memoize its GeoJSON
+    # per tile set instead of re-encoding the same tiles each time
+    return tiles_to_geojson(init()[satellite].iloc[list(tile_rows)])
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def find_intersecting_tiles(satellite, polygons_wkb):
+    # Query the STRtree instead of scanning every tile with GeoDataFrame.intersects;
+    # polygons arrive as WKB so results are memoized per (satellite, AOI)
+    polygons = shapely.from_wkb(polygons_wkb)
+    tile_index = build_tile_index(satellite)
+    # Query all polygons in one call; row 1 of the result holds the tile positions.
+    # Return the positions rather than names so a name repeated in the grid
+    # still maps back to the footprint that was actually hit
+    hits = tile_index.query(polygons, predicate="intersects")[1]
+    # De-duplicate and sort with a numpy C sort instead of a Python set
+    return np.unique(hits).tolist()
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_configuration(config_path, mtime):
+    # Parse the configuration once per process; the modification time in the
+    # cache key reloads it only when the file changes
+    configuration = ConfigLoader(config_file_path=config_path)
+    logger.info("Configuration loaded successfully.")
+    return configuration
+
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def read_config_text(config_path, mtime):
+    # The modification time is part of the cache key, so edits to the file are
+    # picked up while unchanged reruns skip the read
+    with open(config_path, "r") as config_file:
+        return config_file.read()
+
+
 # ---------- PAGE CONFIG ----------
 st.set_page_config(page_title="Satellite Imagery Downloader", layout="wide")
 # Here you would call the function to download products based on the selected options
-configuration = ConfigLoader(config_file_path="config.yaml")
-logger.info("Configuration loaded successfully.")
+configuration = load_configuration("config.yaml", os.path.getmtime("config.yaml"))
 # Initialize session state
 if "geometry" not in st.session_state:
     st.session_state["geometry"] = ""
@@ -280,12 +507,12 @@ with tabs[0]:
             )
     with st.container(border=True):
         # Geographic Area
-        tiles_gdf = sat_tiles.get(satellite)
+        tiles_geojson = serialize_tiles(satellite) if satellite in sat_tiles else None
         drawing_map = create_drawing_map(
             center_lat=12.193479,
             center_lng=123.326770,
             zoom=5,
-            tiles_gdf=tiles_gdf,
+            tiles_geojson=tiles_geojson,
         )
         st.markdown(
             f'<div class="section-title">{geometry_icon_svg} Geographic Area</div>',
@@ -305,59 +532,52 @@ with tabs[0]:
         )
         # Process and display polygon data
         if map_data["all_drawings"] is not None and len(map_data["all_drawings"]) > 0:
-            # Extract polygons from the drawing data
-            current_polygons = []
-            for feature in map_data["all_drawings"]:
-                if feature["geometry"]["type"] in ["Polygon", "Rectangle"]:
-                    coordinates = feature["geometry"]["coordinates"][
-                        0
-                    ]  # Get outer ring
-                    current_polygons.append(
-                        {
-                            "type": feature["geometry"]["type"],
-                            "coordinates": coordinates,
-                            "properties": feature.get("properties", {}),
-                        }
-                    )
-
-            # Create Shapely polygons and get WKT strings
-            wkt_polygons = []
-            for poly_info in current_polygons:
-                try:
-                    polygon = Polygon(poly_info["coordinates"])
-                    wkt_polygons.append(polygon.wkt)
-                except ValueError as e:
-                    wkt_polygons.append(f"# Error creating polygon: {e}")
-
-            # Update session state
-            st.session_state.polygons = current_polygons
-            st.session_state.polygons_wkt = wkt_polygons
-
-            # Find intersecting tiles
+            # Rebuild polygons and intersecting tiles only when the drawings or
+            # the satellite changed since the previous rerun
             tiles_gdf = sat_tiles.get(satellite)
-            intersecting_tiles = []
-            if tiles_gdf is not None:
-                for poly_info in current_polygons:
-                    try:
-                        polygon = Polygon(poly_info["coordinates"])
-                        intersects = tiles_gdf[tiles_gdf.intersects(polygon)]
-                        intersecting_tiles.extend(intersects["Name"].tolist())
-                    except ValueError:
-                        pass
-            st.session_state.intersecting_tiles = list(set(intersecting_tiles))
+            drawings_hash = (satellite, drawings_fingerprint(map_data["all_drawings"]))
+            if drawings_hash != st.session_state.get("last_drawings_hash"):
+                # Extract polygons from the drawing data
+                current_polygons = []
+                for feature in map_data["all_drawings"]:
+                    if feature["geometry"]["type"] in ["Polygon", "Rectangle"]:
+                        coordinates = feature["geometry"]["coordinates"][
+                            0
+                        ]  # Get outer ring
+                        current_polygons.append(
+                            {
+                                "type": feature["geometry"]["type"],
+                                "coordinates": coordinates,
+                                "properties": feature.get("properties", {}),
+                            }
+                        )
+
+                # Create Shapely polygons and get WKT strings
+                polygons = build_polygons(current_polygons)
+
+                # Update session state
+                st.session_state.polygons = current_polygons
+                st.session_state.polygons_wkt = shapely.to_wkt(
+                    polygons, rounding_precision=-1
+                ).tolist()
+
+                # Find intersecting tiles
+                intersecting_rows = []
+                if tiles_gdf is not None:
+                    intersecting_rows = find_intersecting_tiles(
+                        satellite, tuple(shapely.to_wkb(polygons))
+                    )
+                st.session_state.intersecting_rows = intersecting_rows
+                st.session_state.last_drawings_hash = drawings_hash
+            wkt_polygons = st.session_state.polygons_wkt
+            intersecting_rows = st.session_state.intersecting_rows
 
             # Add intersecting tiles layer to the map
-            if intersecting_tiles:
-                intersects_gdf = tiles_gdf[tiles_gdf["Name"].isin(intersecting_tiles)]
+            if intersecting_rows:
                 folium.GeoJson(
-                    intersects_gdf,
+                    serialize_intersecting_tiles(satellite, tuple(intersecting_rows)),
                     name="Intersecting Tiles",
-                    style_function=lambda x: {
-                        "color": "red",
-                        "weight": 3,
-                        "fillColor": "red",
-                        "fillOpacity": 0.3,
-                    },
+                    style_function=lambda x: INTERSECTING_TILE_STYLE,
                 ).add_to(drawing_map)
                 # Update the map display with intersecting tiles
                 st_folium(
@@ -425,6 +645,7 @@ with tabs[0]:
                         wkt_file.write(geometries)
                 # empty nohup.out file
                 open("nohup.out", "w").close()
+                reset_live_logs()
                 # call the cli script with the appropriate arguments
                 os.system(
                     f"nohup python cli.py --provider {provider.lower()} --collection {satellite.split(' ')[0]} --product-type {product_type} --start-date {start_date} --end-date {end_date} &"
@@ -455,6 +676,5 @@ with tabs[1]:
 
 with tabs[2]:
     # show the content of config.yaml
-    with open("config.yaml", "r") as config_file:
-        config_content = config_file.read()
+    config_content = read_config_text("config.yaml", os.path.getmtime("config.yaml"))
     st.code(config_content, language="yaml")